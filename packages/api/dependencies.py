@@ -1,14 +1,21 @@
 import os
+import hmac
+import time
+import base64
+import hashlib
 import logging
-from datetime import datetime, timedelta
+from threading import Lock
 from typing import Optional
 
 import jwt
+import orjson
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, Request, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from models.database import get_db, User
+from services import cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,31 +36,129 @@ if not JWT_SECRET_KEY:
     JWT_SECRET_KEY = secrets.token_urlsafe(32)
     logger.warning("Using auto-generated JWT secret. Set JWT_SECRET_KEY in production.")
 
+_JWT_SECRET_BYTES = JWT_SECRET_KEY.encode("utf-8")
+
 security = HTTPBearer(auto_error=False)
 
+# Decoded token cache, keyed by sha256(token). Entries also carry their own
+# expiry so a token is never served from cache past its "exp" claim.
+TOKEN_CACHE_TTL_SECONDS = 30
+_decoded_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL_SECONDS)
+_decoded_cache_lock = Lock()
+
+# Authenticated User rows, keyed by user id. Entries are detached from their
+# session, so only column attributes are safe to read from them.
+USER_CACHE_TTL_SECONDS = 60
+_user_cache: TTLCache = TTLCache(maxsize=5000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = Lock()
+
 
 def create_access_token(user_id: str) -> str:
     """Create a JWT access token for a user"""
+    now = int(time.time())
     payload = {
         "sub": user_id,
-        "exp": datetime.utcnow() + timedelta(days=JWT_EXPIRATION_DAYS),
-        "iat": datetime.utcnow(),
+        "exp": now + JWT_EXPIRATION_DAYS * 86400,
+        "iat": now,
     }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _JWT_SECRET_BYTES, algorithm=JWT_ALGORITHM)
 
 
-def decode_token(token: str) -> Optional[dict]:
-    """Decode and validate a JWT token"""
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _fast_hs256_decode(token: str) -> Optional[dict]:
+    """
+    Verify an HS256 token without going through PyJWT.
+
+    Only handles the happy path: returns None for anything it can't fully
+    vouch for (other algorithms, bad signatures, expired tokens, malformed
+    input) so the caller can fall back to PyJWT for the error handling.
+    """
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        logger.warning("Token expired")
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        if header.get("alg") != JWT_ALGORITHM:
+            return None
+
+        expected = hmac.new(
+            _JWT_SECRET_BYTES, f"{header_b64}.{payload_b64}".encode(), hashlib.sha256
+        ).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            return None
+
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+    # PyJWT rejects any aud when no audience is expected
+    if not isinstance(payload, dict) or "aud" in payload:
+        return None
+
+    now = time.time()
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= now:
+        return None
+    nbf = payload.get("nbf")
+    if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > now):
         return None
-    except jwt.InvalidTokenError as e:
-        logger.warning(f"Invalid token: {e}")
+    iat = payload.get("iat")
+    if iat is not None and (not isinstance(iat, (int, float)) or iat > now):
         return None
 
+    return payload
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Decode and validate a JWT token"""
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+
+    with _decoded_cache_lock:
+        cached = _decoded_cache.get(key)
+    if cached is not None:
+        payload, expires_at = cached
+        if now < expires_at:
+            return payload
+
+    payload = _fast_hs256_decode(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, _JWT_SECRET_BYTES, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            with _decoded_cache_lock:
+                _decoded_cache.pop(key, None)
+            logger.warning("Token expired")
+            return None
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Invalid token: {e}")
+            return None
+
+    # Cache for at most TOKEN_CACHE_TTL_SECONDS, and never past the token's expiry
+    expires_at = min(now + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", now))
+    if expires_at > now:
+        with _decoded_cache_lock:
+            _decoded_cache[key] = (payload, expires_at)
+
+    return payload
+
+
+def evict_local_user(user_id: str) -> None:
+    """Drop a user from this process's authenticated-user cache"""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+async def invalidate_cached_user(user_id: str) -> None:
+    """Drop a user from the authenticated-user caches of every worker"""
+    evict_local_user(user_id)
+    await cache.invalidate_user(user_id)
+
+
+def _user_fields(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
 
 async def get_current_user(
     request: Request,
@@ -88,9 +193,25 @@ async def get_current_user(
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    with _user_cache_lock:
+        user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    fields = await cache.get_user_fields(user_id)
+    if fields is not None:
+        user = User(**fields)
+        make_transient_to_detached(user)
+    else:
+        user = db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+
+        db.expunge(user)
+        await cache.set_user_fields(user_id, _user_fields(user))
+
+    with _user_cache_lock:
+        _user_cache[user_id] = user
 
     return user
 
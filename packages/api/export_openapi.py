@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Write the API's OpenAPI schema to openapi.json.
+
+Run at image build time (see Dockerfile). main.py then serves the file
+instead of generating the schema in every worker. Re-run it after changing
+any route or schema if you keep a local copy.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import orjson
+from fastapi import FastAPI
+
+from main import app, OPENAPI_SCHEMA_PATH
+
+if __name__ == "__main__":
+    # Call FastAPI.openapi directly so an existing (possibly stale) file is
+    # regenerated rather than read back
+    schema = FastAPI.openapi(app)
+
+    with open(OPENAPI_SCHEMA_PATH, "wb") as f:
+        f.write(orjson.dumps(schema))
+
+    print(f"Wrote {OPENAPI_SCHEMA_PATH}")
@@ -1,35 +1,52 @@
 import os
-import json
+import re
+import sys
+import uuid
 import base64
-import secrets
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Set, Tuple, Union
+from urllib.parse import urlencode, quote, urlparse
 
 import httpx
+import msgspec
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, Request, Response, Query
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Query, Cookie, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Row, func, literal, select, tuple_, update
 
-from models.database import init_db, get_db, User, Chart, SavedChart, Like
+from models.database import init_db, get_db, SessionLocal, User, Chart, SavedChart, Like
 from dependencies import (
     get_current_user,
     get_optional_user,
     create_access_token,
+    decode_token,
+    invalidate_cached_user,
+    evict_local_user,
     IS_PRODUCTION,
 )
+import schemas_fast
+from services import cache
 from schemas import (
     UserResponse,
     ChartCreate,
     ChartUpdate,
     ChartResponse,
+    ChartResponseWithUserState,
     ChartListResponse,
+    ChartListWithUsersResponse,
     SavedChartResponse,
     LikeResponse,
     TokenResponse,
+    CHART_LIST_ADAPTER,
+    CHART_LIST_JSON_SERIALIZER,
+    to_epoch,
 )
 
 # Load environment variables
@@ -49,13 +66,68 @@ GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID", "")
 GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET", "")
 GOOGLE_REDIRECT_URI = os.environ.get("GOOGLE_REDIRECT_URI", "http://localhost:8080/auth/callback")
 
+# Create missing tables on boot; set to 0 where the schema is managed separately
+RUN_MIGRATIONS = os.environ.get("RUN_MIGRATIONS", "1") == "1"
+
+GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
+_STATIC_AUTH_PARAMS = urlencode({
+    "client_id": GOOGLE_CLIENT_ID,
+    "redirect_uri": GOOGLE_REDIRECT_URI,
+    "scope": "openid email profile",
+    "response_type": "code",
+    "access_type": "offline",
+})
+
+# Shared client for Google OAuth calls, so connections are pooled across callbacks
+google_http_client: Optional[httpx.AsyncClient] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global google_http_client
+
+    if RUN_MIGRATIONS:
+        logger.info("Initializing database...")
+        init_db()
+        logger.info("Database initialized")
+
+    google_http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=20),
+    )
+    await cache.init_cache(on_user_invalidated=evict_local_user)
+
+    yield
+
+    await cache.close_cache()
+    await google_http_client.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Charts Agent API",
     description="Backend API for Charts Agent - AI-powered chart visualization",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+# Written at image build time by export_openapi.py. Without it, FastAPI
+# generates the schema on the first /openapi.json request as usual.
+OPENAPI_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openapi.json")
+
+
+def _static_openapi() -> dict:
+    if app.openapi_schema is None:
+        with open(OPENAPI_SCHEMA_PATH, "rb") as f:
+            app.openapi_schema = orjson.loads(f.read())
+    return app.openapi_schema
+
+
+if os.path.exists(OPENAPI_SCHEMA_PATH):
+    app.openapi = _static_openapi
+
 # CORS configuration
 allowed_origins = [FRONTEND_URL]
 if ALLOWED_FRONTEND_DOMAINS:
@@ -75,19 +147,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 
-# Initialize database on startup
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Initializing database...")
-    init_db()
-    logger.info("Database initialized")
-
-
 # Health check
 @app.get("/health")
 async def health_check():
@@ -98,27 +163,90 @@ async def health_check():
 # Authentication Endpoints
 # ============================================================================
 
+def _origin(url: str) -> Optional[Tuple[str, str]]:
+    """Normalize url to its (scheme, host) origin, or None if it has neither"""
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    if not parsed.scheme or not parsed.netloc:
+        return None
+    return parsed.scheme, parsed.netloc.lower()
+
+
+def _load_frontend_origins(urls: List[str]) -> frozenset:
+    origins = set()
+    for url in urls:
+        if not url.strip():
+            continue
+        origin = _origin(url)
+        if origin is None:
+            # A bare "app.example.com" would parse to ('', '') and match
+            # relative redirect targets
+            logger.warning(f"Ignoring frontend domain without scheme://host: {url!r}")
+            continue
+        origins.add(origin)
+    return frozenset(origins)
+
+
+# Origins the OAuth callback may redirect back to, resolved once at import
+_ALLOWED_FRONTEND_ORIGINS = _load_frontend_origins([FRONTEND_URL] + ALLOWED_FRONTEND_DOMAINS)
+
+
 def _safe_frontend_target(target: Optional[str]) -> str:
     """Validate and return a safe frontend redirect URL"""
     if not target:
         return FRONTEND_URL
 
-    # Check against allowed domains
-    allowed = [FRONTEND_URL] + [d.strip() for d in ALLOWED_FRONTEND_DOMAINS if d.strip()]
+    # Compare whole origins so e.g. https://app.example.com.evil.com
+    # can't pass as https://app.example.com
+    try:
+        parsed = urlparse(target)
+    except ValueError:
+        parsed = None
 
-    # Allow localhost in development
-    if not IS_PRODUCTION:
-        if target.startswith("http://localhost:") or target.startswith("http://127.0.0.1:"):
+    if parsed is not None:
+        # Allow localhost in development
+        if not IS_PRODUCTION and parsed.scheme == "http" and parsed.hostname in ("localhost", "127.0.0.1"):
             return target
 
-    for domain in allowed:
-        if target.startswith(domain):
+        if _origin(target) in _ALLOWED_FRONTEND_ORIGINS:
             return target
 
     logger.warning(f"Blocked redirect to untrusted domain: {target}")
     return FRONTEND_URL
 
 
+def _id_token_user_info(id_token: Optional[str]) -> Optional[dict]:
+    """Extract the userinfo-shaped user profile from a Google ID token"""
+    # The token comes straight from Google's token endpoint over TLS, so its
+    # signature needn't be re-verified (OpenID Connect Core 3.1.3.7)
+    if not id_token:
+        return None
+
+    try:
+        payload_b64 = id_token.split(".")[1]
+        claims = orjson.loads(base64.urlsafe_b64decode(payload_b64 + "=" * (-len(payload_b64) % 4)))
+    except (IndexError, ValueError):
+        return None
+
+    if not isinstance(claims, dict):
+        return None
+    if claims.get("aud") != GOOGLE_CLIENT_ID:
+        return None
+    if claims.get("iss") not in ("https://accounts.google.com", "accounts.google.com"):
+        return None
+    if not claims.get("sub") or not claims.get("email"):
+        return None
+
+    return {
+        "id": claims["sub"],
+        "email": claims["email"],
+        "name": claims.get("name"),
+        "picture": claims.get("picture"),
+    }
+
+
 @app.get("/auth/google")
 async def google_auth(target: Optional[str] = None):
     """Initiate Google OAuth flow"""
@@ -126,23 +254,15 @@ async def google_auth(target: Optional[str] = None):
         raise HTTPException(status_code=500, detail="Google OAuth not configured")
 
     # Generate state with nonce and optional frontend target
-    nonce = secrets.token_urlsafe(32)
+    nonce = base64.urlsafe_b64encode(os.urandom(18)).rstrip(b"=").decode()
     state_data = {"nonce": nonce}
     if target:
         state_data["frontend"] = target
 
-    state = base64.urlsafe_b64encode(json.dumps(state_data).encode()).decode()
+    state = base64.urlsafe_b64encode(orjson.dumps(state_data)).decode()
 
     # Build authorization URL
-    auth_url = (
-        "https://accounts.google.com/o/oauth2/v2/auth?"
-        f"client_id={GOOGLE_CLIENT_ID}&"
-        f"redirect_uri={GOOGLE_REDIRECT_URI}&"
-        "scope=openid%20email%20profile&"
-        "response_type=code&"
-        "access_type=offline&"
-        f"state={state}"
-    )
+    auth_url = f"{GOOGLE_AUTH_URL}?{_STATIC_AUTH_PARAMS}&state={quote(state)}"
 
     return {"auth_url": auth_url}
 
@@ -151,7 +271,6 @@ async def google_auth(target: Optional[str] = None):
 async def google_callback(
     code: str,
     state: str,
-    db: Session = Depends(get_db),
 ):
     """Handle Google OAuth callback"""
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
@@ -159,33 +278,34 @@ async def google_callback(
 
     # Decode state
     try:
-        state_data = json.loads(base64.urlsafe_b64decode(state).decode())
+        state_data = orjson.loads(base64.urlsafe_b64decode(state))
         frontend_target = _safe_frontend_target(state_data.get("frontend"))
     except Exception:
         frontend_target = FRONTEND_URL
 
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": GOOGLE_REDIRECT_URI,
-            },
-        )
+    token_response = await google_http_client.post(
+        "https://oauth2.googleapis.com/token",
+        data={
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": GOOGLE_REDIRECT_URI,
+        },
+    )
 
-        if token_response.status_code != 200:
-            logger.error(f"Token exchange failed: {token_response.text}")
-            raise HTTPException(status_code=400, detail="Failed to exchange code for token")
+    if token_response.status_code != 200:
+        logger.error(f"Token exchange failed: {token_response.text}")
+        raise HTTPException(status_code=400, detail="Failed to exchange code for token")
 
-        tokens = token_response.json()
-        access_token = tokens.get("access_token")
+    tokens = token_response.json()
+    access_token = tokens.get("access_token")
 
-        # Get user info
-        user_response = await client.get(
+    # Read the profile from the ID token; only call userinfo if it's unusable
+    user_info = _id_token_user_info(tokens.get("id_token"))
+    if user_info is None:
+        user_response = await google_http_client.get(
             f"https://www.googleapis.com/oauth2/v2/userinfo?access_token={access_token}"
         )
 
@@ -201,29 +321,34 @@ async def google_callback(
     name = user_info.get("name")
     picture = user_info.get("picture")
 
-    user = db.query(User).filter(User.google_id == google_id).first()
-
-    if user:
-        # Update existing user
-        user.email = email
-        user.name = name
-        user.picture = picture
-        user.last_login = datetime.utcnow()
-    else:
-        # Create new user
-        user = User(
-            google_id=google_id,
-            email=email,
-            name=name,
-            picture=picture,
-        )
-        db.add(user)
-
-    db.commit()
-    db.refresh(user)
+    # Only check out a connection now, not for the Google round-trips above
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.google_id == google_id).first()
+
+        if user:
+            # Update existing user
+            user.email = email
+            user.name = name
+            user.picture = picture
+            user.last_login = datetime.utcnow()
+        else:
+            # Create new user
+            user = User(
+                google_id=google_id,
+                email=email,
+                name=name,
+                picture=picture,
+            )
+            db.add(user)
+
+        db.commit()
+        db.refresh(user)
+        user_id = user.id
+
+    await invalidate_cached_user(user_id)
 
     # Generate JWT token
-    jwt_token = create_access_token(user.id)
+    jwt_token = create_access_token(user_id)
 
     # Redirect to frontend with token
     redirect_url = f"{frontend_target}?auth_token={jwt_token}"
@@ -241,15 +366,13 @@ async def set_auth_cookie(
     db: Session = Depends(get_db),
 ):
     """Exchange a URL token for an httpOnly cookie"""
-    from dependencies import decode_token
-
     payload = decode_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
 
     # Verify user exists
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
@@ -268,8 +391,13 @@ async def set_auth_cookie(
 
 
 @app.post("/api/auth/logout")
-async def logout(response: Response):
+async def logout(response: Response, auth_token: Optional[str] = Cookie(None)):
     """Clear the authentication cookie"""
+    if auth_token:
+        payload = decode_token(auth_token)
+        if payload and payload.get("sub"):
+            await invalidate_cached_user(payload["sub"])
+
     response.delete_cookie(
         key="auth_token",
         httponly=True,
@@ -289,34 +417,81 @@ async def get_current_user_info(
     current_user: User = Depends(get_current_user),
 ):
     """Get current authenticated user info"""
-    return current_user
+    return ORJSONResponse(_user_to_response(current_user).model_dump())
 
 
 # ============================================================================
 # Chart Endpoints
 # ============================================================================
 
+def _user_chart_state(
+    chart_ids: List[str],
+    current_user: Optional[User],
+    db: Session,
+) -> Tuple[Set[str], Set[str]]:
+    """Fetch the ids of charts the user has liked and saved, out of chart_ids"""
+    if not current_user or not chart_ids:
+        return set(), set()
+
+    liked_ids = {
+        row[0]
+        for row in db.query(Like.chart_id).filter(
+            Like.user_id == current_user.id,
+            Like.chart_id.in_(chart_ids),
+        )
+    }
+    saved_ids = {
+        row[0]
+        for row in db.query(SavedChart.chart_id).filter(
+            SavedChart.user_id == current_user.id,
+            SavedChart.chart_id.in_(chart_ids),
+        )
+    }
+    return liked_ids, saved_ids
+
+
+def _user_to_response(user: User) -> UserResponse:
+    return UserResponse(
+        email=user.email,
+        name=user.name,
+        picture=user.picture,
+        id=user.id,
+        created_at=user.created_at,
+        last_login=user.last_login,
+    )
+
+
 def _chart_to_response(
     chart: Chart,
     current_user: Optional[User] = None,
     db: Optional[Session] = None,
+    liked_ids: Optional[Set[str]] = None,
+    saved_ids: Optional[Set[str]] = None,
 ) -> ChartResponse:
-    """Convert a Chart model to a ChartResponse with computed fields"""
+    """Convert a Chart model to a ChartResponse (with user state when known)"""
     is_liked = False
     is_saved = False
+    user_state = {}
 
-    if current_user and db:
-        is_liked = db.query(Like).filter(
+    if liked_ids is not None and saved_ids is not None:
+        is_liked = chart.id in liked_ids
+        is_saved = chart.id in saved_ids
+    elif current_user and db:
+        is_liked = db.query(Like.id).filter(
             Like.user_id == current_user.id,
             Like.chart_id == chart.id,
         ).first() is not None
 
-        is_saved = db.query(SavedChart).filter(
+        is_saved = db.query(SavedChart.id).filter(
             SavedChart.user_id == current_user.id,
             SavedChart.chart_id == chart.id,
         ).first() is not None
 
-    return ChartResponse(
+    if current_user or liked_ids is not None:
+        user_state = {"is_liked": is_liked, "is_saved": is_saved}
+    response_type = ChartResponseWithUserState if user_state else ChartResponse
+
+    return response_type(
         id=chart.id,
         user_id=chart.user_id,
         title=chart.title,
@@ -325,92 +500,312 @@ def _chart_to_response(
         config=chart.config,
         source_type=chart.source_type,
         source_url=chart.source_url,
-        is_public=bool(chart.is_public),
+        is_public=chart.is_public,
         view_count=chart.view_count,
         like_count=chart.like_count,
         created_at=chart.created_at,
         updated_at=chart.updated_at,
-        is_liked=is_liked,
-        is_saved=is_saved,
-        user=UserResponse.model_validate(chart.user) if chart.user else None,
+        user=_user_to_response(chart.user) if chart.user else None,
+        **user_state,
+    )
+
+
+# Columns fetched by the chart list endpoints, which read plain rows instead of
+# materializing Chart/User ORM objects
+CHART_LIST_COLUMNS = (
+    Chart.id,
+    Chart.user_id,
+    Chart.title,
+    Chart.description,
+    Chart.data,
+    Chart.config,
+    Chart.source_type,
+    Chart.source_url,
+    Chart.is_public,
+    Chart.view_count,
+    Chart.like_count,
+    Chart.created_at,
+    Chart.updated_at,
+    User.email.label("user_email"),
+    User.name.label("user_name"),
+    User.picture.label("user_picture"),
+    User.created_at.label("user_created_at"),
+    User.last_login.label("user_last_login"),
+)
+
+# Documents the alternative encodings negotiated_response picks by Accept
+LIST_RESPONSE_FORMATS = {
+    200: {"content": {schemas_fast.MSGPACK_MEDIA_TYPE: {}, schemas_fast.NDJSON_MEDIA_TYPE: {}}},
+}
+
+
+def _chart_row_to_response(
+    row: Row,
+    liked_ids: Optional[Set[str]],
+    saved_ids: Optional[Set[str]],
+    users: Dict[str, schemas_fast.UserResponse],
+    embed_user: bool = True,
+) -> schemas_fast.ChartResponse:
+    """Convert a CHART_LIST_COLUMNS row to a ChartResponse struct"""
+    # Charts by the same owner share one UserResponse from users
+    user = users.get(row.user_id)
+    if user is None:
+        user = users[row.user_id] = schemas_fast.UserResponse(
+            email=sys.intern(row.user_email),
+            name=row.user_name,
+            picture=row.user_picture,
+            id=row.user_id,
+            created_at=to_epoch(row.user_created_at),
+            last_login=to_epoch(row.user_last_login) if row.user_last_login else None,
+        )
+
+    if liked_ids is None:
+        struct, user_state = schemas_fast.ChartResponse, {}
+    else:
+        struct = schemas_fast.ChartResponseWithUserState
+        user_state = {"is_liked": row.id in liked_ids, "is_saved": row.id in saved_ids}
+
+    return struct(
+        id=row.id,
+        user_id=row.user_id,
+        title=row.title,
+        description=row.description,
+        data=row.data,
+        config=row.config,
+        source_type=row.source_type,
+        source_url=row.source_url,
+        is_public=row.is_public,
+        view_count=row.view_count,
+        like_count=row.like_count,
+        created_at=to_epoch(row.created_at),
+        updated_at=to_epoch(row.updated_at) if row.updated_at else None,
+        user=user if embed_user else None,
+        **user_state,
+    )
+
+
+def _chart_list_response(
+    rows: List[Row],
+    liked_ids: Optional[Set[str]],
+    saved_ids: Optional[Set[str]],
+    limit: int,
+    next_cursor: Optional[str],
+    accept: Optional[str],
+    group_users: bool,
+) -> Response:
+    """Build a chart list page; NDJSON lines always embed their user"""
+    group_users = group_users and not schemas_fast.wants_ndjson(accept)
+    users: Dict[str, schemas_fast.UserResponse] = {}
+    charts = [
+        _chart_row_to_response(r, liked_ids, saved_ids, users, embed_user=not group_users)
+        for r in rows
+    ]
+
+    if group_users:
+        content = schemas_fast.ChartListWithUsersResponse(
+            charts=charts, limit=limit, next_cursor=next_cursor, users=users
+        )
+    else:
+        content = schemas_fast.ChartListResponse(charts=charts, limit=limit, next_cursor=next_cursor)
+    return schemas_fast.negotiated_response(accept, content)
+
+
+def _chart_row_to_mapping(
+    row: Row,
+    liked_ids: Set[str],
+    saved_ids: Set[str],
+) -> dict:
+    """Convert a CHART_LIST_COLUMNS row to a dict of ChartResponse fields"""
+    # A dict takes pydantic-core's mapping fast path instead of a getattr per field
+    fields = dict(row._mapping)
+    fields["user"] = {
+        "email": fields.pop("user_email"),
+        "name": fields.pop("user_name"),
+        "picture": fields.pop("user_picture"),
+        "id": row.user_id,
+        "created_at": fields.pop("user_created_at"),
+        "last_login": fields.pop("user_last_login"),
+    }
+    fields["is_liked"] = row.id in liked_ids
+    fields["is_saved"] = row.id in saved_ids
+    return fields
+
+
+def _encode_cursor(row: Row) -> str:
+    """Encode a chart row's (created_at, id) sort key as an opaque page cursor"""
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a page cursor produced by _encode_cursor"""
+    try:
+        created_at, chart_id = base64.urlsafe_b64decode(cursor).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), str(uuid.UUID(chart_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _paginate_charts(
+    db: Session,
+    criteria: list,
+    limit: int,
+    cursor: Optional[str],
+) -> Tuple[List[Row], Optional[str]]:
+    """Fetch one keyset-paginated page of chart rows and the next cursor"""
+    stmt = select(*CHART_LIST_COLUMNS).join(Chart.user).where(*criteria)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Chart.created_at, Chart.id)
+            < tuple_(
+                literal(cursor_created_at, Chart.created_at.type),
+                literal(cursor_id, Chart.id.type),
+            )
+        )
+
+    rows = db.execute(
+        stmt.order_by(Chart.created_at.desc(), Chart.id.desc()).limit(limit + 1)
+    ).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, _encode_cursor(rows[-1])
+    return rows, None
+
+
+def _inline_schema_refs(node, defs: dict):
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_schema_refs(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+        return {key: _inline_schema_refs(value, defs) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_inline_schema_refs(value, defs) for value in node]
+    return node
+
+
+def _json_body_docs(model: type) -> dict:
+    """OpenAPI request body for routes that validate their raw body themselves"""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_schema_refs(schema, defs)}},
+        }
+    }
+
+
+def _msgspec_error_loc(path: str) -> tuple:
+    """Turn a msgspec error path like `$.data.series[0]` into a pydantic-style loc"""
+    return tuple(
+        name or int(index)
+        for name, index in re.findall(r"\.([^.\[`]+)|\[(\d+)\]", path)
+    )
+
+
+async def _decode_body(request: Request, json_decoder, msgpack_decoder):
+    """Decode the raw JSON or MessagePack request body into a msgspec Struct"""
+    body = await request.body()
+    is_msgpack = request.headers.get("content-type", "").startswith(schemas_fast.MSGPACK_MEDIA_TYPE)
+    decoder = msgpack_decoder if is_msgpack else json_decoder
+    try:
+        return decoder.decode(body)
+    except msgspec.ValidationError as e:
+        msg, _, path = str(e).partition(" - at ")
+        raise RequestValidationError(
+            [{"type": "value_error", "loc": ("body", *_msgspec_error_loc(path)), "msg": msg}]
+        )
+    except msgspec.DecodeError as e:
+        error_type, label = ("msgpack_invalid", "MessagePack") if is_msgpack else ("json_invalid", "JSON")
+        raise RequestValidationError(
+            [{"type": error_type, "loc": ("body",), "msg": f"Invalid {label}: {e}"}]
+        )
+
+
+async def chart_create_body(request: Request) -> schemas_fast.ChartCreate:
+    return await _decode_body(
+        request, schemas_fast.chart_create_json_decoder, schemas_fast.chart_create_msgpack_decoder
+    )
+
+
+async def chart_update_body(request: Request) -> schemas_fast.ChartUpdate:
+    return await _decode_body(
+        request, schemas_fast.chart_update_json_decoder, schemas_fast.chart_update_msgpack_decoder
     )
 
 
-@app.post("/api/charts", response_model=ChartResponse)
+@app.post("/api/charts", response_model=ChartResponseWithUserState, openapi_extra=_json_body_docs(ChartCreate))
 async def create_chart(
-    chart_data: ChartCreate,
+    chart_data: schemas_fast.ChartCreate = Depends(chart_create_body),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Create a new chart"""
-    chart = Chart(
-        user_id=current_user.id,
-        title=chart_data.title,
-        description=chart_data.description,
-        data=chart_data.data.model_dump(),
-        config=chart_data.config.model_dump(),
-        source_type=chart_data.source_type,
-        source_url=chart_data.source_url,
-        is_public=1 if chart_data.is_public else 0,
-    )
+    chart = Chart(user_id=current_user.id, **msgspec.to_builtins(chart_data))
 
     db.add(chart)
     db.commit()
     db.refresh(chart)
 
-    return _chart_to_response(chart, current_user, db)
+    return ORJSONResponse(_chart_to_response(chart, current_user, db).model_dump())
 
 
-@app.get("/api/charts", response_model=ChartListResponse)
+@app.get(
+    "/api/charts",
+    response_model=Union[ChartListResponse, ChartListWithUsersResponse],
+    response_class=schemas_fast.MsgspecJSONResponse,
+    responses=LIST_RESPONSE_FORMATS,
+)
 async def list_my_charts(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    group_users: bool = Query(False, description="Send each owner once in a users map"),
+    accept: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """List current user's charts"""
-    query = db.query(Chart).filter(Chart.user_id == current_user.id)
-    total = query.count()
+    rows, next_cursor = _paginate_charts(db, [Chart.user_id == current_user.id], limit, cursor)
+    liked_ids, saved_ids = _user_chart_state([r.id for r in rows], current_user, db)
 
-    charts = query.order_by(Chart.created_at.desc()).offset(offset).limit(limit).all()
-
-    return ChartListResponse(
-        charts=[_chart_to_response(c, current_user, db) for c in charts],
-        total=total,
-        limit=limit,
-        offset=offset,
-    )
+    return _chart_list_response(rows, liked_ids, saved_ids, limit, next_cursor, accept, group_users)
 
 
-@app.get("/api/charts/public", response_model=ChartListResponse)
+@app.get(
+    "/api/charts/public",
+    response_model=Union[ChartListResponse, ChartListWithUsersResponse],
+    response_class=schemas_fast.MsgspecJSONResponse,
+    responses=LIST_RESPONSE_FORMATS,
+)
 async def list_public_charts(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    group_users: bool = Query(False, description="Send each owner once in a users map"),
+    accept: Optional[str] = Header(None),
     current_user: Optional[User] = Depends(get_optional_user),
     db: Session = Depends(get_db),
 ):
     """List public charts (discover page)"""
-    query = db.query(Chart).filter(Chart.is_public == 1)
-    total = query.count()
-
-    charts = query.order_by(Chart.created_at.desc()).offset(offset).limit(limit).all()
-
-    return ChartListResponse(
-        charts=[_chart_to_response(c, current_user, db) for c in charts],
-        total=total,
-        limit=limit,
-        offset=offset,
+    # "= true" (rather than IS TRUE) matches the partial index predicate
+    criteria = [Chart.is_public == True]  # noqa: E712
+    rows, next_cursor = _paginate_charts(db, criteria, limit, cursor)
+    # Anonymous visitors get charts without the is_liked/is_saved flags
+    liked_ids, saved_ids = (
+        _user_chart_state([r.id for r in rows], current_user, db) if current_user else (None, None)
     )
 
+    return _chart_list_response(rows, liked_ids, saved_ids, limit, next_cursor, accept, group_users)
 
-@app.get("/api/charts/{chart_id}", response_model=ChartResponse)
+
+@app.get("/api/charts/{chart_id}", response_model=Union[ChartResponseWithUserState, ChartResponse])
 async def get_chart(
     chart_id: str,
     current_user: Optional[User] = Depends(get_optional_user),
     db: Session = Depends(get_db),
 ):
     """Get a single chart by ID"""
-    chart = db.query(Chart).filter(Chart.id == chart_id).first()
+    chart = db.get(Chart, chart_id)
 
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
@@ -420,22 +815,27 @@ async def get_chart(
         if not current_user or chart.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Access denied")
 
-    # Increment view count
-    chart.view_count += 1
+    # Increment view count atomically (the session also syncs the loaded chart)
+    db.execute(
+        update(Chart)
+        .where(Chart.id == chart_id)
+        .values(view_count=Chart.view_count + 1)
+    )
+    response = _chart_to_response(chart, current_user, db)
     db.commit()
 
-    return _chart_to_response(chart, current_user, db)
+    return ORJSONResponse(response.model_dump())
 
 
-@app.put("/api/charts/{chart_id}", response_model=ChartResponse)
+@app.put("/api/charts/{chart_id}", response_model=ChartResponseWithUserState, openapi_extra=_json_body_docs(ChartUpdate))
 async def update_chart(
     chart_id: str,
-    chart_data: ChartUpdate,
+    chart_data: schemas_fast.ChartUpdate = Depends(chart_update_body),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Update a chart"""
-    chart = db.query(Chart).filter(Chart.id == chart_id).first()
+    chart = db.get(Chart, chart_id)
 
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
@@ -449,16 +849,16 @@ async def update_chart(
     if chart_data.description is not None:
         chart.description = chart_data.description
     if chart_data.data is not None:
-        chart.data = chart_data.data.model_dump()
+        chart.data = msgspec.to_builtins(chart_data.data)
     if chart_data.config is not None:
-        chart.config = chart_data.config.model_dump()
+        chart.config = msgspec.to_builtins(chart_data.config)
     if chart_data.is_public is not None:
-        chart.is_public = 1 if chart_data.is_public else 0
+        chart.is_public = chart_data.is_public
 
     db.commit()
     db.refresh(chart)
 
-    return _chart_to_response(chart, current_user, db)
+    return ORJSONResponse(_chart_to_response(chart, current_user, db).model_dump())
 
 
 @app.delete("/api/charts/{chart_id}")
@@ -468,7 +868,7 @@ async def delete_chart(
     db: Session = Depends(get_db),
 ):
     """Delete a chart"""
-    chart = db.query(Chart).filter(Chart.id == chart_id).first()
+    chart = db.get(Chart, chart_id)
 
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
@@ -493,13 +893,13 @@ async def save_chart(
     db: Session = Depends(get_db),
 ):
     """Save/bookmark a chart"""
-    chart = db.query(Chart).filter(Chart.id == chart_id).first()
+    chart = db.get(Chart, chart_id)
 
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
 
     # Check if already saved
-    existing = db.query(SavedChart).filter(
+    existing = db.query(SavedChart.id).filter(
         SavedChart.user_id == current_user.id,
         SavedChart.chart_id == chart_id,
     ).first()
@@ -512,12 +912,12 @@ async def save_chart(
     db.commit()
     db.refresh(saved)
 
-    return SavedChartResponse(
+    return ORJSONResponse(SavedChartResponse(
         id=saved.id,
         chart_id=saved.chart_id,
         created_at=saved.created_at,
         chart=_chart_to_response(chart, current_user, db),
-    )
+    ).model_dump())
 
 
 @app.delete("/api/charts/{chart_id}/save")
@@ -541,28 +941,75 @@ async def unsave_chart(
     return {"status": "ok"}
 
 
-@app.get("/api/saved", response_model=List[SavedChartResponse])
+def _saved_charts_query(user_id: str):
+    return (
+        select(
+            SavedChart.id.label("saved_id"),
+            SavedChart.created_at.label("saved_at"),
+            *CHART_LIST_COLUMNS,
+        )
+        .join(SavedChart.chart)
+        .join(Chart.user)
+        .where(SavedChart.user_id == user_id)
+        .order_by(SavedChart.created_at.desc())
+    )
+
+
+def _saved_row_to_response(
+    row: Row,
+    liked_ids: Set[str],
+    saved_ids: Set[str],
+    users: Dict[str, schemas_fast.UserResponse],
+) -> schemas_fast.SavedChartResponse:
+    return schemas_fast.SavedChartResponse(
+        id=row.saved_id,
+        chart_id=row.id,
+        created_at=to_epoch(row.saved_at),
+        chart=_chart_row_to_response(row, liked_ids, saved_ids, users),
+    )
+
+
+def _stream_saved_charts(user: User) -> Iterator[schemas_fast.SavedChartResponse]:
+    """Yield a user's saved charts, NDJSON_CHUNK_SIZE rows at a time"""
+    # Runs while the response is sent, after the request's session has been
+    # closed, so it opens its own
+    with SessionLocal() as db:
+        result = db.execute(
+            _saved_charts_query(user.id).execution_options(yield_per=schemas_fast.NDJSON_CHUNK_SIZE)
+        )
+        for rows in result.partitions():
+            liked_ids, _ = _user_chart_state([r.id for r in rows], user, db)
+            saved_ids = {r.id for r in rows}
+            users: Dict[str, schemas_fast.UserResponse] = {}
+            for r in rows:
+                yield _saved_row_to_response(r, liked_ids, saved_ids, users)
+
+
+@app.get(
+    "/api/saved",
+    response_model=List[SavedChartResponse],
+    response_class=schemas_fast.MsgspecJSONResponse,
+    responses=LIST_RESPONSE_FORMATS,
+)
 async def list_saved_charts(
+    accept: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """List user's saved charts"""
-    saved_charts = (
-        db.query(SavedChart)
-        .filter(SavedChart.user_id == current_user.id)
-        .order_by(SavedChart.created_at.desc())
-        .all()
-    )
-
-    return [
-        SavedChartResponse(
-            id=s.id,
-            chart_id=s.chart_id,
-            created_at=s.created_at,
-            chart=_chart_to_response(s.chart, current_user, db),
+    if schemas_fast.wants_ndjson(accept):
+        return schemas_fast.ndjson_response(
+            _stream_saved_charts(current_user), headers={"Vary": "Accept"}
         )
-        for s in saved_charts
-    ]
+
+    rows = db.execute(_saved_charts_query(current_user.id)).all()
+    liked_ids, _ = _user_chart_state([r.id for r in rows], current_user, db)
+    saved_ids = {r.id for r in rows}
+    users: Dict[str, schemas_fast.UserResponse] = {}
+
+    return schemas_fast.negotiated_response(accept, [
+        _saved_row_to_response(r, liked_ids, saved_ids, users) for r in rows
+    ])
 
 
 # ============================================================================
@@ -576,13 +1023,13 @@ async def like_chart(
     db: Session = Depends(get_db),
 ):
     """Like a chart"""
-    chart = db.query(Chart).filter(Chart.id == chart_id).first()
+    chart = db.get(Chart, chart_id)
 
     if not chart:
         raise HTTPException(status_code=404, detail="Chart not found")
 
     # Check if already liked
-    existing = db.query(Like).filter(
+    existing = db.query(Like.id).filter(
         Like.user_id == current_user.id,
         Like.chart_id == chart_id,
     ).first()
@@ -594,16 +1041,20 @@ async def like_chart(
     db.add(like)
 
     # Update like count
-    chart.like_count += 1
+    db.execute(
+        update(Chart)
+        .where(Chart.id == chart_id)
+        .values(like_count=Chart.like_count + 1)
+    )
 
     db.commit()
     db.refresh(like)
 
-    return LikeResponse(
+    return ORJSONResponse(LikeResponse(
         id=like.id,
         chart_id=like.chart_id,
-        created_at=like.created_at,
-    )
+        created_at=to_epoch(like.created_at),
+    ))
 
 
 @app.delete("/api/charts/{chart_id}/like")
@@ -622,9 +1073,11 @@ async def unlike_chart(
         raise HTTPException(status_code=404, detail="Like not found")
 
     # Update like count
-    chart = db.query(Chart).filter(Chart.id == chart_id).first()
-    if chart and chart.like_count > 0:
-        chart.like_count -= 1
+    db.execute(
+        update(Chart)
+        .where(Chart.id == chart_id, Chart.like_count > 0)
+        .values(like_count=Chart.like_count - 1)
+    )
 
     db.delete(like)
     db.commit()
@@ -632,24 +1085,26 @@ async def unlike_chart(
     return {"status": "ok"}
 
 
-@app.get("/api/liked", response_model=List[ChartResponse])
+@app.get("/api/liked", response_model=List[ChartResponseWithUserState])
 async def list_liked_charts(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """List user's liked charts"""
-    likes = (
-        db.query(Like)
-        .filter(Like.user_id == current_user.id)
+    rows = db.execute(
+        select(*CHART_LIST_COLUMNS)
+        .select_from(Like)
+        .join(Like.chart)
+        .join(Chart.user)
+        .where(Like.user_id == current_user.id)
         .order_by(Like.created_at.desc())
-        .all()
-    )
+    ).all()
+    liked_ids, saved_ids = _user_chart_state([r.id for r in rows], current_user, db)
 
-    return [
-        _chart_to_response(like.chart, current_user, db)
-        for like in likes
-        if like.chart
-    ]
+    charts = CHART_LIST_ADAPTER.validate_python(
+        [_chart_row_to_mapping(r, liked_ids, saved_ids) for r in rows]
+    )
+    return Response(content=CHART_LIST_JSON_SERIALIZER(charts), media_type="application/json")
 
 
 # ============================================================================
@@ -3,6 +3,8 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
+import orjson
+
 from sqlalchemy import (
     create_engine,
     Column,
@@ -12,10 +14,14 @@ from sqlalchemy import (
     JSON,
     ForeignKey,
     Integer,
+    Boolean,
     Index,
-    UniqueConstraint,
+    inspect,
+    text,
 )
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import sessionmaker, relationship, declarative_base
+from sqlalchemy.types import TypeDecorator
 
 # Determine database URL
 DATABASE_URL = os.environ.get("DATABASE_URL")
@@ -34,20 +40,36 @@ if not DATABASE_URL:
         # Fallback to SQLite for local development
         DATABASE_URL = "sqlite:///./charts_agent.db"
 
+# Use the psycopg (v3) driver for PostgreSQL
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
+if DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = "postgresql+psycopg://" + DATABASE_URL[len("postgresql://"):]
+
+
 # Configure engine based on database type
 if DATABASE_URL.startswith("postgresql"):
     engine = create_engine(
         DATABASE_URL,
-        pool_size=10,
-        max_overflow=20,
+        query_cache_size=1200,
+        json_deserializer=orjson.loads,
+        pool_size=20,
+        max_overflow=40,
+        pool_timeout=5,
         pool_pre_ping=True,
         pool_recycle=3600,
-        connect_args={"options": "-c timezone=utc"}
+        connect_args={
+            # Server-side prepare statements after 5 executions
+            "prepare_threshold": 5,
+            "options": "-c timezone=utc",
+        }
     )
 else:
     # SQLite
     engine = create_engine(
         DATABASE_URL,
+        query_cache_size=1200,
+        json_deserializer=orjson.loads,
         connect_args={"check_same_thread": False}
     )
 
@@ -59,10 +81,38 @@ def generate_uuid() -> str:
     return str(uuid.uuid4())
 
 
+class GUID(TypeDecorator):
+    """
+    UUID stored natively (16 bytes) on PostgreSQL and as String(36) elsewhere.
+
+    Values are always plain strings on the Python side.
+    """
+    impl = String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(UUID(as_uuid=False))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            # A malformed id can't match any row; bind NULL so lookups find
+            # nothing instead of failing the uuid cast on PostgreSQL.
+            return None
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else str(value)
+
+
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String(36), primary_key=True, default=generate_uuid)
+    id = Column(GUID, primary_key=True, default=generate_uuid)
     email = Column(String(255), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=True)
     picture = Column(Text, nullable=True)
@@ -79,8 +129,8 @@ class User(Base):
 class Chart(Base):
     __tablename__ = "charts"
 
-    id = Column(String(36), primary_key=True, default=generate_uuid)
-    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(GUID, primary_key=True, default=generate_uuid)
+    user_id = Column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(500), nullable=True)
     description = Column(Text, nullable=True)
 
@@ -93,7 +143,7 @@ class Chart(Base):
     source_url = Column(Text, nullable=True)
 
     # Metadata
-    is_public = Column(Integer, default=0)  # 0 = private, 1 = public
+    is_public = Column(Boolean, default=False, nullable=False)
     view_count = Column(Integer, default=0)
     like_count = Column(Integer, default=0)
 
@@ -106,8 +156,15 @@ class Chart(Base):
     likes = relationship("Like", back_populates="chart", cascade="all, delete-orphan")
 
     __table_args__ = (
-        Index("ix_charts_user_created", "user_id", "created_at"),
-        Index("ix_charts_public_created", "is_public", "created_at"),
+        # Also serves user_id lookups; scanned backwards for newest-first pages
+        Index("ix_charts_user_created", "user_id", "created_at", "id"),
+        # Only public charts are ever listed by recency, so index just those
+        Index(
+            "ix_charts_public_feed",
+            "created_at",
+            "id",
+            postgresql_where=text("is_public = true"),
+        ),
     )
 
 
@@ -115,9 +172,9 @@ class SavedChart(Base):
     """User's saved/bookmarked charts (can be their own or others' public charts)"""
     __tablename__ = "saved_charts"
 
-    id = Column(String(36), primary_key=True, default=generate_uuid)
-    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    chart_id = Column(String(36), ForeignKey("charts.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(GUID, primary_key=True, default=generate_uuid)
+    user_id = Column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    chart_id = Column(GUID, ForeignKey("charts.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -125,7 +182,9 @@ class SavedChart(Base):
     chart = relationship("Chart", back_populates="saved_by")
 
     __table_args__ = (
-        UniqueConstraint("user_id", "chart_id", name="uq_user_saved_chart"),
+        # Unique index doubles as the (user_id, chart_id) existence probe;
+        # INCLUDE id lets that probe be answered from the index alone
+        Index("uq_user_saved_chart", "user_id", "chart_id", unique=True, postgresql_include=["id"]),
         Index("ix_saved_user_created", "user_id", "created_at"),
     )
 
@@ -134,9 +193,9 @@ class Like(Base):
     """Likes on charts"""
     __tablename__ = "likes"
 
-    id = Column(String(36), primary_key=True, default=generate_uuid)
-    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    chart_id = Column(String(36), ForeignKey("charts.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(GUID, primary_key=True, default=generate_uuid)
+    user_id = Column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    chart_id = Column(GUID, ForeignKey("charts.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -144,14 +203,139 @@ class Like(Base):
     chart = relationship("Chart", back_populates="likes")
 
     __table_args__ = (
-        UniqueConstraint("user_id", "chart_id", name="uq_user_like_chart"),
+        Index("uq_user_like_chart", "user_id", "chart_id", unique=True, postgresql_include=["id"]),
         Index("ix_likes_chart_created", "chart_id", "created_at"),
     )
 
 
+# Indexes older models created that the current models no longer declare
+_RETIRED_INDEXES = (
+    "ix_charts_user_id",  # covered by ix_charts_user_created
+    "ix_saved_charts_user_id",  # covered by uq_user_saved_chart
+    "ix_likes_user_id",  # covered by uq_user_like_chart
+    "ix_likes_chart_id",  # covered by ix_likes_chart_created
+)
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers starting with
+# RUN_MIGRATIONS don't race each other through the schema upgrade.
+_SCHEMA_UPGRADE_LOCK = 0x63686172
+
+
+def _index_shape(reflected: dict) -> tuple:
+    return (
+        bool(reflected["unique"]),
+        list(reflected["column_names"]),
+        list(reflected.get("include_columns") or []),
+    )
+
+
+def _model_index_shape(index: Index) -> tuple:
+    return (
+        bool(index.unique),
+        [column.name for column in index.columns],
+        list(index.dialect_options["postgresql"]["include"] or []),
+    )
+
+
+def _upgrade_postgres_schema(conn) -> None:
+    """
+    Bring a PostgreSQL database created by older models up to date.
+
+    create_all() only creates missing tables and never alters existing ones,
+    so column type and index changes are applied here. Every step checks the
+    live schema first, making this a no-op on an up-to-date database.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SCHEMA_UPGRADE_LOCK})
+    quote = conn.dialect.identifier_preparer.quote
+
+    table_names = [table.name for table in Base.metadata.sorted_tables]
+    column_types = {
+        (row.table_name, row.column_name): row.data_type
+        for row in conn.execute(
+            text(
+                "SELECT table_name, column_name, data_type "
+                "FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = ANY(:tables)"
+            ),
+            {"tables": table_names},
+        )
+    }
+
+    # Ids used to be VARCHAR(36); GUID now maps to native uuid. Foreign keys
+    # must be dropped while the referenced and referencing columns disagree.
+    stale_ids = [
+        (table.name, column.name)
+        for table in Base.metadata.sorted_tables
+        for column in table.columns
+        if isinstance(column.type, GUID)
+        and column_types.get((table.name, column.name), "uuid") != "uuid"
+    ]
+    if stale_ids:
+        foreign_keys = conn.execute(
+            text(
+                "SELECT conrelid::regclass::text AS table_name, conname, "
+                "pg_get_constraintdef(oid) AS definition "
+                "FROM pg_constraint "
+                "WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tables)"
+            ),
+            {"tables": table_names},
+        ).all()
+        for fk in foreign_keys:
+            conn.execute(text(f"ALTER TABLE {fk.table_name} DROP CONSTRAINT {quote(fk.conname)}"))
+        for table_name, column_name in stale_ids:
+            column = quote(column_name)
+            conn.execute(
+                text(f"ALTER TABLE {quote(table_name)} ALTER COLUMN {column} TYPE uuid USING {column}::uuid")
+            )
+        for fk in foreign_keys:
+            conn.execute(
+                text(f"ALTER TABLE {fk.table_name} ADD CONSTRAINT {quote(fk.conname)} {fk.definition}")
+            )
+
+    # is_public used to be a nullable INTEGER flag (NULL counted as private).
+    if column_types.get(("charts", "is_public")) == "integer":
+        conn.execute(text(
+            "ALTER TABLE charts ALTER COLUMN is_public TYPE boolean "
+            "USING COALESCE(is_public, 0) <> 0"
+        ))
+        conn.execute(text("ALTER TABLE charts ALTER COLUMN is_public SET NOT NULL"))
+        # Superseded by the partial ix_charts_public_feed index
+        conn.execute(text("DROP INDEX IF EXISTS ix_charts_public_created"))
+
+    for name in _RETIRED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {quote(name)}"))
+
+    # Drop model indexes whose columns changed since they were created (e.g.
+    # ix_charts_user_created gaining id) so the loop below rebuilds them.
+    # The unique pairs used to be UNIQUE constraints; they come back as
+    # unique indexes with INCLUDE (id).
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        live_indexes = {index["name"]: index for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            live = live_indexes.get(index.name)
+            if live is None or _index_shape(live) == _model_index_shape(index):
+                continue
+            if "duplicates_constraint" in live:
+                conn.execute(text(
+                    f"ALTER TABLE {quote(table.name)} "
+                    f"DROP CONSTRAINT {quote(live['duplicates_constraint'])}"
+                ))
+            else:
+                conn.execute(text(f"DROP INDEX {quote(index.name)}"))
+
+    # Indexes added (or dropped above) since the tables were first created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            _upgrade_postgres_schema(conn)
 
 
 def get_db():
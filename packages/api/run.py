@@ -22,5 +22,7 @@ if __name__ == "__main__":
         "main:app",
         host=host,
         port=port,
+        # uvloop is installed on every platform but Windows (see requirements.txt)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
         reload=os.environ.get("ENVIRONMENT") != "production",
     )
@@ -1,28 +1,74 @@
-from datetime import datetime
-from typing import Optional, List, Any, Dict
-from pydantic import BaseModel, Field
+import sys
+import dataclasses
+from datetime import datetime, timezone
+from typing import Annotated, Dict, Literal, Optional, List, Union
+
+import numpy as np
+from pydantic import (
+    BaseModel, ConfigDict, Field, TypeAdapter, AfterValidator, PlainValidator, PlainSerializer,
+    WithJsonSchema,
+)
+from pydantic.dataclasses import dataclass
+
+
+def to_epoch(value: datetime) -> int:
+    """Unix seconds for a timestamp; naive values are UTC, as stored"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+# Timestamps go out as Unix seconds rather than ISO strings. Integers are
+# also accepted on input (pydantic parses them as Unix time natively).
+EpochDatetime = Annotated[datetime, PlainSerializer(to_epoch, return_type=int)]
+
+
+# Interned so that a list response repeating the same owner shares one string
+InternedStr = Annotated[str, AfterValidator(sys.intern)]
 
 
 # User schemas
 class UserBase(BaseModel):
-    email: str
+    email: InternedStr
     name: Optional[str] = None
     picture: Optional[str] = None
 
 
 class UserResponse(UserBase):
-    id: str
-    created_at: datetime
-    last_login: Optional[datetime] = None
+    model_config = ConfigDict(frozen=True)
 
-    class Config:
-        from_attributes = True
+    id: str
+    created_at: EpochDatetime
+    last_login: Optional[EpochDatetime] = None
 
 
 # Chart schemas
-class ChartDataSeries(BaseModel):
+def _as_float_array(value) -> np.ndarray:
+    # Only real numbers: strings (even numeric ones), bools and None are
+    # rejected, as are NaN/Inf, which JSON can't represent
+    array = np.asarray(value)
+    if array.ndim != 1 or (array.size and array.dtype.kind not in "iuf"):
+        raise ValueError("Input should be a list of numbers")
+    array = array.astype(np.float64, copy=False)
+    if not np.isfinite(array).all():
+        raise ValueError("Input should be a list of finite numbers")
+    return array
+
+
+# A series of floats held as a float64 array: validated with one numpy cast
+# instead of per-item float checks, and written out by orjson's numpy support
+NDFloatArray = Annotated[
+    np.ndarray,
+    PlainValidator(_as_float_array),
+    PlainSerializer(lambda array: array.tolist(), when_used="json"),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
+
+
+@dataclass(slots=True, frozen=True)
+class ChartDataSeries:
     name: str
-    data: List[float]
+    data: NDFloatArray
 
 
 class ChartData(BaseModel):
@@ -33,10 +79,16 @@ class ChartData(BaseModel):
     aiReasoning: Optional[str] = None
 
 
+# Mirrors the unions in packages/shared/src/types.ts
+ChartType = Literal["bar", "line", "area", "pie", "radar", "scatter", "table", "infographic"]
+ColorScheme = Literal["default", "monochrome", "warm", "cool", "editorial", "muted"]
+StyleVariant = Literal["professional", "playful", "editorial", "minimalist", "bold"]
+
+
 class ChartConfig(BaseModel):
-    type: str = "bar"
-    colorScheme: str = "default"
-    styleVariant: str = "professional"
+    type: ChartType = "bar"
+    colorScheme: ColorScheme = "default"
+    styleVariant: StyleVariant = "professional"
     showGrid: bool = True
     showLegend: bool = True
     showValues: bool = False
@@ -44,6 +96,31 @@ class ChartConfig(BaseModel):
     title: Optional[str] = None
 
 
+class ChartConfigResponse(ChartConfig):
+    """
+    ChartConfig as stored. Charts saved before the Literal types above may
+    hold other values, so responses pass these through unchecked.
+    """
+    type: str = "bar"
+    colorScheme: str = "default"
+    styleVariant: str = "professional"
+
+
+# Bit i of a packed config's "flags" int holds CHART_CONFIG_FLAGS[i]
+CHART_CONFIG_FLAGS = ("showGrid", "showLegend", "showValues", "animate")
+
+
+def pack_config_flags(config: dict) -> dict:
+    """Replace a config dict's boolean options with a single "flags" int"""
+    packed = {k: v for k, v in config.items() if k not in CHART_CONFIG_FLAGS}
+    flags = 0
+    for bit, name in enumerate(CHART_CONFIG_FLAGS):
+        if config.get(name, ChartConfig.model_fields[name].default):
+            flags |= 1 << bit
+    packed["flags"] = flags
+    return packed
+
+
 class ChartCreate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -63,58 +140,97 @@ class ChartUpdate(BaseModel):
 
 
 class ChartResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     user_id: str
     title: Optional[str] = None
     description: Optional[str] = None
-    data: Dict[str, Any]
-    config: Dict[str, Any]
+    data: ChartData
+    config: ChartConfigResponse
     source_type: Optional[str] = None
     source_url: Optional[str] = None
     is_public: bool
     view_count: int
     like_count: int
-    created_at: datetime
-    updated_at: Optional[datetime] = None
+    created_at: EpochDatetime
+    updated_at: Optional[EpochDatetime] = None
+    user: Optional[UserResponse] = None
 
-    # Computed fields (populated by API)
+
+class ChartResponseWithUserState(ChartResponse):
+    """ChartResponse for a signed-in request, with that user's like/save state"""
     is_liked: bool = False
     is_saved: bool = False
-    user: Optional[UserResponse] = None
 
-    class Config:
-        from_attributes = True
+
+# Serializes a list of charts straight to JSON bytes; built once here rather
+# than per request
+CHART_LIST_ADAPTER = TypeAdapter(List[ChartResponseWithUserState])
+CHART_LIST_JSON_SERIALIZER = CHART_LIST_ADAPTER.dump_json
 
 
 class ChartListResponse(BaseModel):
-    charts: List[ChartResponse]
-    total: int
+    model_config = ConfigDict(frozen=True)
+
+    charts: List[Union[ChartResponseWithUserState, ChartResponse]]
     limit: int
-    offset: int
+    next_cursor: Optional[str] = None
+
+
+class ChartListWithUsersResponse(ChartListResponse):
+    """
+    ChartListResponse for ?group_users=true: each chart's user is null and
+    the owners are sent once each in users, keyed by user_id.
+    """
+    users: Dict[str, UserResponse]
 
 
 # Saved charts
 class SavedChartResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     chart_id: str
-    created_at: datetime
-    chart: ChartResponse
-
-    class Config:
-        from_attributes = True
+    created_at: EpochDatetime
+    chart: ChartResponseWithUserState
 
 
 # Like
-class LikeResponse(BaseModel):
+# LikeResponse and TokenResponse are built from trusted values, so they are
+# plain dataclasses with no validation step
+@dataclasses.dataclass(slots=True, frozen=True)
+class LikeResponse:
     id: str
     chart_id: str
-    created_at: datetime
-
-    class Config:
-        from_attributes = True
+    created_at: int
 
 
 # Auth
-class TokenResponse(BaseModel):
+@dataclasses.dataclass(slots=True, frozen=True)
+class TokenResponse:
     access_token: str
     token_type: str = "bearer"
+
+
+def _warm_up_serializers() -> None:
+    """
+    Serialize a sample chart once at import time, so the first real response
+    in a fresh worker doesn't pay the one-off setup costs of the serializers.
+    """
+    sample = ChartResponseWithUserState.model_validate({
+        "id": "",
+        "user_id": "",
+        "data": {"labels": ["a"], "series": [{"name": "a", "data": [0.0]}]},
+        "config": {},
+        "is_public": False,
+        "view_count": 0,
+        "like_count": 0,
+        "created_at": datetime.min,
+    })
+    sample.model_dump()
+    CHART_LIST_JSON_SERIALIZER([sample])
+    ChartListResponse(charts=[sample], limit=1).model_dump_json()
+
+
+_warm_up_serializers()
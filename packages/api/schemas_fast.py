@@ -0,0 +1,242 @@
+"""
+msgspec mirrors of the hot-path schemas in schemas.py.
+
+List endpoints build these Structs and encode them in a single C pass with
+MsgspecJSONResponse; keep their fields in sync with the Pydantic response
+models in schemas.py, which also drive the OpenAPI docs. Chart create/update
+bodies decode straight into ChartCreate/ChartUpdate here, and these Structs
+are the only write-side validation: the Pydantic ChartCreate/ChartUpdate
+models just document the request bodies in OpenAPI.
+Timestamps are Unix seconds (see schemas.to_epoch).
+
+MessagePack responses also pack each chart config's boolean options into a
+single "flags" int (see schemas.pack_config_flags). NDJSON responses stream
+one chart (or saved chart) per line, with a list's next_cursor moved to the
+X-Next-Cursor header.
+"""
+import sys
+from typing import Annotated, Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import msgspec
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from schemas import (
+    CHART_CONFIG_FLAGS,
+    ChartConfig as ChartConfigModel,
+    ChartType,
+    ColorScheme,
+    StyleVariant,
+    pack_config_flags,
+)
+
+
+class UserResponse(msgspec.Struct, kw_only=True):
+    email: str
+    name: Optional[str] = None
+    picture: Optional[str] = None
+    id: str
+    created_at: int
+    last_login: Optional[int] = None
+
+
+class ChartResponse(msgspec.Struct, kw_only=True):
+    id: str
+    user_id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    data: Dict[str, Any]
+    config: Dict[str, Any]
+    source_type: Optional[str] = None
+    source_url: Optional[str] = None
+    is_public: bool
+    view_count: int
+    like_count: int
+    created_at: int
+    updated_at: Optional[int] = None
+    user: Optional[UserResponse] = None
+
+
+class ChartResponseWithUserState(ChartResponse, kw_only=True):
+    is_liked: bool = False
+    is_saved: bool = False
+
+
+class ChartListResponse(msgspec.Struct, kw_only=True):
+    charts: List[ChartResponse]
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class ChartListWithUsersResponse(ChartListResponse, kw_only=True):
+    users: Dict[str, UserResponse]
+
+
+class SavedChartResponse(msgspec.Struct, kw_only=True):
+    id: str
+    chart_id: str
+    created_at: int
+    chart: ChartResponseWithUserState
+
+
+# Rejects NaN and +/-Inf (which MessagePack can carry), as JSON can't store them
+FiniteFloat = Annotated[float, msgspec.Meta(ge=-sys.float_info.max, le=sys.float_info.max)]
+
+
+class ChartDataSeries(msgspec.Struct, kw_only=True):
+    name: str
+    data: List[FiniteFloat]
+
+
+class ChartData(msgspec.Struct, kw_only=True):
+    labels: List[str]
+    series: List[ChartDataSeries]
+    suggestedType: Optional[str] = None
+    suggestedTitle: Optional[str] = None
+    aiReasoning: Optional[str] = None
+
+
+class ChartConfig(msgspec.Struct, kw_only=True):
+    type: ChartType = "bar"
+    colorScheme: ColorScheme = "default"
+    styleVariant: StyleVariant = "professional"
+    showGrid: Union[bool, msgspec.UnsetType] = msgspec.UNSET
+    showLegend: Union[bool, msgspec.UnsetType] = msgspec.UNSET
+    showValues: Union[bool, msgspec.UnsetType] = msgspec.UNSET
+    animate: Union[bool, msgspec.UnsetType] = msgspec.UNSET
+    title: Optional[str] = None
+    flags: Union[int, msgspec.UnsetType] = msgspec.UNSET
+
+    def __post_init__(self):
+        # Inverse of schemas.pack_config_flags. Explicit booleans win, then
+        # the packed flags, then the ChartConfig defaults
+        for bit, name in enumerate(CHART_CONFIG_FLAGS):
+            if getattr(self, name) is msgspec.UNSET:
+                if self.flags is msgspec.UNSET:
+                    setattr(self, name, ChartConfigModel.model_fields[name].default)
+                else:
+                    setattr(self, name, bool(self.flags >> bit & 1))
+        self.flags = msgspec.UNSET
+
+
+class ChartCreate(msgspec.Struct, kw_only=True):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    data: ChartData
+    config: ChartConfig
+    source_type: Optional[str] = None
+    source_url: Optional[str] = None
+    is_public: bool = False
+
+
+class ChartUpdate(msgspec.Struct, kw_only=True):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    data: Optional[ChartData] = None
+    config: Optional[ChartConfig] = None
+    is_public: Optional[bool] = None
+
+
+MSGPACK_MEDIA_TYPE = "application/vnd.msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Lines encoded per chunk written to the socket by NDJSON responses
+NDJSON_CHUNK_SIZE = 64
+
+json_encoder = msgspec.json.Encoder()
+msgpack_encoder = msgspec.msgpack.Encoder()
+
+chart_create_json_decoder = msgspec.json.Decoder(ChartCreate)
+chart_create_msgpack_decoder = msgspec.msgpack.Decoder(ChartCreate)
+chart_update_json_decoder = msgspec.json.Decoder(ChartUpdate)
+chart_update_msgpack_decoder = msgspec.msgpack.Decoder(ChartUpdate)
+
+
+class MsgspecJSONResponse(JSONResponse):
+    """JSON response rendered with msgspec"""
+
+    def render(self, content: Any) -> bytes:
+        return json_encoder.encode(content)
+
+
+class MsgspecMsgpackResponse(Response):
+    """MessagePack response rendered with msgspec"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack_encoder.encode(content)
+
+
+def _ndjson_chunks(items: Iterable[Any]) -> Iterator[bytes]:
+    buffer = bytearray()
+    lines = 0
+    for item in items:
+        json_encoder.encode_into(item, buffer, -1)
+        buffer.extend(b"\n")
+        lines += 1
+        if lines == NDJSON_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+            lines = 0
+    if buffer:
+        yield bytes(buffer)
+
+
+def ndjson_response(items: Iterable[Any], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Stream items as NDJSON, NDJSON_CHUNK_SIZE lines per write.
+
+    items may be a generator (see list_saved_charts), in which case only one
+    chunk's worth of items needs to exist at a time.
+    """
+    return StreamingResponse(_ndjson_chunks(items), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def _charts_in(content: Any) -> List[ChartResponse]:
+    if isinstance(content, ChartListResponse):
+        return content.charts
+    return [item.chart for item in content if isinstance(item, SavedChartResponse)]
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    return bool(accept) and MSGPACK_MEDIA_TYPE in accept
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept and not wants_msgpack(accept)
+
+
+def negotiated_response(accept: Optional[str], content: Any) -> Response:
+    """Render content as MessagePack or NDJSON if the client asked for it, else JSON"""
+    headers = {"Vary": "Accept"}
+    if wants_msgpack(accept):
+        for chart in _charts_in(content):
+            chart.config = pack_config_flags(chart.config)
+        return MsgspecMsgpackResponse(content, headers=headers)
+    if wants_ndjson(accept):
+        items = content
+        if isinstance(content, ChartListResponse):
+            items = content.charts
+            if content.next_cursor is not None:
+                headers["X-Next-Cursor"] = content.next_cursor
+        return ndjson_response(items, headers=headers)
+    return MsgspecJSONResponse(content, headers=headers)
+
+
+def _warm_up_encoders() -> None:
+    """Encode a sample chart list once so the first list response is not cold"""
+    sample = ChartListResponse(
+        charts=[ChartResponseWithUserState(
+            id="", user_id="", data={}, config={}, is_public=False,
+            view_count=0, like_count=0, created_at=0,
+            user=UserResponse(email="", id="", created_at=0),
+        )],
+        limit=1,
+    )
+    json_encoder.encode(sample)
+    msgpack_encoder.encode(sample)
+    json_encoder.encode([SavedChartResponse(
+        id="", chart_id="", created_at=0, chart=sample.charts[0]
+    )])
+
+
+_warm_up_encoders()
@@ -0,0 +1,152 @@
+"""
+Shared (Redis) cache behind the per-process caches in dependencies.py.
+
+Each uvicorn worker keeps its own in-memory caches. When REDIS_URL is set,
+authenticated User rows are also cached in Redis so a row loaded by one
+worker is reused by the others, and user invalidations are broadcast over
+pub/sub so every worker evicts its local copy. Without REDIS_URL every
+function here is a no-op.
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Optional
+
+import orjson
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+USER_KEY_TTL_SECONDS = 60
+FILL_LOCK_TTL_SECONDS = 5
+INVALIDATION_CHANNEL = "cache:invalidate:user"
+# Redis is an optional tier: when it's unreachable, calls on the request
+# path must fail fast and fall back to the database rather than hang
+SOCKET_TIMEOUT_SECONDS = 0.25
+
+_USER_DATETIME_FIELDS = ("created_at", "last_login")
+
+_pool: Optional[redis.ConnectionPool] = None
+_client: Optional[redis.Redis] = None
+_listener: Optional[asyncio.Task] = None
+
+
+def _user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+async def init_cache(on_user_invalidated: Callable[[str], None]) -> None:
+    """Connect to Redis and start listening for user invalidations"""
+    global _pool, _client, _listener
+
+    if not REDIS_URL:
+        return
+
+    _pool = redis.ConnectionPool.from_url(
+        REDIS_URL,
+        socket_connect_timeout=SOCKET_TIMEOUT_SECONDS,
+        socket_timeout=SOCKET_TIMEOUT_SECONDS,
+    )
+    _client = redis.Redis(connection_pool=_pool)
+    _listener = asyncio.create_task(_listen_for_invalidations(on_user_invalidated))
+    logger.info("Shared cache connected")
+
+
+async def close_cache() -> None:
+    global _pool, _client, _listener
+
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+    if _client is not None:
+        await _client.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+
+    _pool = _client = _listener = None
+
+
+async def _listen_for_invalidations(on_user_invalidated: Callable[[str], None]) -> None:
+    # A dedicated client without a read timeout: the subscriber idles between
+    # messages and socket_timeout would cut every idle read short
+    client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=SOCKET_TIMEOUT_SECONDS)
+    try:
+        while True:
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            on_user_invalidated(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener failed, retrying: {e}")
+                await asyncio.sleep(1)
+    finally:
+        await client.aclose()
+
+
+async def get_user_fields(user_id: str) -> Optional[dict]:
+    """
+    Return the cached column values of a user, or None on a miss.
+
+    When another worker is already loading the same user (it holds the fill
+    lock), wait briefly for its result rather than also hitting the database.
+    """
+    if _client is None:
+        return None
+
+    try:
+        raw = await _client.get(_user_key(user_id))
+        if raw is None:
+            acquired = await _client.set(
+                f"{_user_key(user_id)}:lock", 1, nx=True, ex=FILL_LOCK_TTL_SECONDS
+            )
+            if acquired:
+                return None
+            await asyncio.sleep(0.05)
+            raw = await _client.get(_user_key(user_id))
+            if raw is None:
+                return None
+    except redis.RedisError as e:
+        logger.warning(f"Shared cache read failed: {e}")
+        return None
+
+    fields = orjson.loads(raw)
+    for name in _USER_DATETIME_FIELDS:
+        if fields.get(name):
+            fields[name] = datetime.fromisoformat(fields[name])
+    return fields
+
+
+async def set_user_fields(user_id: str, fields: dict) -> None:
+    """Store the column values of a user"""
+    if _client is None:
+        return
+
+    try:
+        async with _client.pipeline(transaction=False) as pipe:
+            pipe.set(_user_key(user_id), orjson.dumps(fields), ex=USER_KEY_TTL_SECONDS)
+            pipe.delete(f"{_user_key(user_id)}:lock")
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Shared cache write failed: {e}")
+
+
+async def invalidate_user(user_id: str) -> None:
+    """Drop a user from the shared cache and tell every worker to evict it"""
+    if _client is None:
+        return
+
+    try:
+        await _client.delete(_user_key(user_id))
+        await _client.publish(INVALIDATION_CHANNEL, user_id)
+    except redis.RedisError as e:
+        logger.warning(f"Shared cache invalidation failed: {e}")
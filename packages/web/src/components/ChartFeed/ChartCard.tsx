@@ -25,8 +25,8 @@ interface ChartCardProps {
 }
 
 export function ChartCard({ chart, onChartClick, onUpdate }: ChartCardProps) {
-  const [isLiked, setIsLiked] = useState(chart.is_liked);
-  const [isSaved, setIsSaved] = useState(chart.is_saved);
+  const [isLiked, setIsLiked] = useState(chart.is_liked ?? false);
+  const [isSaved, setIsSaved] = useState(chart.is_saved ?? false);
   const [likeCount, setLikeCount] = useState(chart.like_count);
   const [isLikeLoading, setIsLikeLoading] = useState(false);
   const [isSaveLoading, setIsSaveLoading] = useState(false);
@@ -174,8 +174,8 @@ export function ChartCard({ chart, onChartClick, onUpdate }: ChartCardProps) {
     }
   };
 
-  const formatDate = (dateString: string) => {
-    const date = new Date(dateString);
+  const formatDate = (epochSeconds: number) => {
+    const date = new Date(epochSeconds * 1000);
     const now = new Date();
     const diffMs = now.getTime() - date.getTime();
     const diffDays = Math.floor(diffMs / (1000 * 60 * 60 * 24));
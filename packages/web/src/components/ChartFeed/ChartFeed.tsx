@@ -21,24 +21,25 @@ export function ChartFeed({ onChartSelect, onBack }: ChartFeedProps) {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [hasMore, setHasMore] = useState(true);
-  const [offset, setOffset] = useState(0);
+  const [cursor, setCursor] = useState<string | null>(null);
 
   const LIMIT = 20;
 
-  const fetchCharts = useCallback(async (tab: FeedTab, resetOffset = true) => {
+  const fetchCharts = useCallback(async (tab: FeedTab, reset = true) => {
     setIsLoading(true);
     setError(null);
 
-    const currentOffset = resetOffset ? 0 : offset;
+    const currentCursor = reset ? null : cursor;
 
     try {
       let fetchedCharts: ChartResponse[] = [];
 
       switch (tab) {
         case 'explore': {
-          const response = await getPublicCharts(LIMIT, currentOffset);
+          const response = await getPublicCharts(LIMIT, currentCursor);
           fetchedCharts = response.charts;
-          setHasMore(response.charts.length === LIMIT);
+          setCursor(response.next_cursor);
+          setHasMore(response.next_cursor !== null);
           break;
         }
         case 'saved': {
@@ -54,12 +55,10 @@ export function ChartFeed({ onChartSelect, onBack }: ChartFeedProps) {
         }
       }
 
-      if (resetOffset) {
+      if (reset) {
         setCharts(fetchedCharts);
-        setOffset(LIMIT);
       } else {
         setCharts((prev) => [...prev, ...fetchedCharts]);
-        setOffset((prev) => prev + LIMIT);
       }
     } catch (err) {
       console.error('Failed to fetch charts:', err);
@@ -67,7 +66,7 @@ export function ChartFeed({ onChartSelect, onBack }: ChartFeedProps) {
     } finally {
       setIsLoading(false);
     }
-  }, [offset]);
+  }, [cursor]);
 
   useEffect(() => {
     fetchCharts(activeTab, true);
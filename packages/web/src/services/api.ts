@@ -45,7 +45,7 @@ export interface User {
   email: string;
   name: string | null;
   picture: string | null;
-  created_at: string;
+  created_at: number; // Unix seconds
 }
 
 export async function getCurrentUser(): Promise<User> {
@@ -78,17 +78,17 @@ export interface ChartResponse {
   is_public: boolean;
   view_count: number;
   like_count: number;
-  created_at: string;
-  is_liked: boolean;
-  is_saved: boolean;
+  created_at: number; // Unix seconds
+  // Only present for signed-in requests
+  is_liked?: boolean;
+  is_saved?: boolean;
   user?: User;
 }
 
 export interface ChartListResponse {
   charts: ChartResponse[];
-  total: number;
   limit: number;
-  offset: number;
+  next_cursor: string | null;
 }
 
 export interface CreateChartData {
@@ -118,12 +118,17 @@ export async function createChart(data: CreateChartData): Promise<ChartResponse>
   return apiRequest('/api/charts', { method: 'POST', body: data });
 }
 
-export async function getMyCharts(limit = 20, offset = 0): Promise<ChartListResponse> {
-  return apiRequest(`/api/charts?limit=${limit}&offset=${offset}`);
+function pageParams(limit: number, cursor?: string | null): string {
+  const params = `?limit=${limit}`;
+  return cursor ? `${params}&cursor=${encodeURIComponent(cursor)}` : params;
 }
 
-export async function getPublicCharts(limit = 20, offset = 0): Promise<ChartListResponse> {
-  return apiRequest(`/api/charts/public?limit=${limit}&offset=${offset}`);
+export async function getMyCharts(limit = 20, cursor?: string | null): Promise<ChartListResponse> {
+  return apiRequest(`/api/charts${pageParams(limit, cursor)}`);
+}
+
+export async function getPublicCharts(limit = 20, cursor?: string | null): Promise<ChartListResponse> {
+  return apiRequest(`/api/charts/public${pageParams(limit, cursor)}`);
 }
 
 export async function getChart(chartId: string): Promise<ChartResponse> {